@@ -0,0 +1,285 @@
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from werkzeug.serving import make_server, WSGIRequestHandler
+
+import blockchain_center_dist as node
+from blockchain_center_dist import Blockchain, Transaction
+from PoWPoS import PoSNode
+from verifier import BatchVerifier
+from wallet import Wallet
+
+# 基准测试：测量挖矿、验证、序列化、PoS 出块者选择和 HTTP 接口的性能，结果写入 JSON 便于比较多次运行
+
+
+def quiet():
+    # 屏蔽节点代码中的 print，避免输出影响计时
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    # 不打印每个请求的访问日志
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def best_of(func, repeat):
+    # 重复运行取最短耗时，减少系统抖动的影响
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def make_transactions(count, nonce=0):
+    # 金额必须为正，同一发送方在不同区块中使用递增的 nonce
+    return [Transaction(f"User{i}", f"User{i + 1}", i + 1, nonce) for i in range(count)]
+
+
+def build_chain(length, block_size, difficulty=1):
+    blockchain = Blockchain(difficulty=difficulty)
+    with quiet():
+        for round_index in range(length):
+            blockchain.pending_transactions.extend(make_transactions(block_size, round_index))
+            blockchain.mine_block("Miner")
+    return blockchain
+
+
+def bench_calculate_hash(block_sizes, iterations, repeat):
+    results = []
+    blockchain = Blockchain()
+    for block_size in block_sizes:
+        transactions = make_transactions(block_size)
+
+        def run():
+            for nonce in range(iterations):
+                blockchain.calculate_hash(1, "0" * 64, 0, transactions, nonce)
+
+        elapsed = best_of(run, repeat)
+        results.append({"name": "calculate_hash", "params": {"block_size": block_size}, "value": iterations / elapsed, "unit": "hashes/s"})
+    return results
+
+
+def bench_mine_block(difficulties, block_sizes, rounds):
+    results = []
+    for difficulty in difficulties:
+        for block_size in block_sizes:
+            blockchain = Blockchain(difficulty=difficulty)
+            hashes = 0
+            elapsed = 0.0
+            with quiet():
+                for _ in range(rounds):
+                    blockchain.pending_transactions = make_transactions(block_size)
+                    start = time.perf_counter()
+                    block = blockchain.mine_block("Miner")
+                    elapsed += time.perf_counter() - start
+                    hashes += block.nonce + 1
+            results.append({"name": "mine_block", "params": {"difficulty": difficulty, "block_size": block_size},
+                            "value": hashes / elapsed, "unit": "hashes/s"})
+            results.append({"name": "mine_block_time", "params": {"difficulty": difficulty, "block_size": block_size},
+                            "value": elapsed / rounds, "unit": "s/block"})
+    return results
+
+
+def bench_is_valid(chain_lengths, block_size, repeat):
+    results = []
+    for length in chain_lengths:
+        blockchain = build_chain(length, block_size)
+        elapsed = best_of(blockchain.is_valid, repeat)
+        results.append({"name": "is_valid", "params": {"chain_length": length, "block_size": block_size}, "value": elapsed, "unit": "s"})
+    return results
+
+
+def bench_serialization(chain_length, block_size, repeat):
+    blockchain = build_chain(chain_length, block_size)
+
+    def run_to_dict():
+        for block in blockchain.chain:
+            block.to_dict()
+
+    def run_jsonify():
+        with node.app.app_context():
+            node.jsonify({"blocks": [block.to_dict() for block in blockchain.chain]}).get_data()
+
+    params = {"chain_length": chain_length, "block_size": block_size}
+    return [
+        {"name": "to_dict", "params": params, "value": best_of(run_to_dict, repeat), "unit": "s"},
+        {"name": "jsonify", "params": params, "value": best_of(run_jsonify, repeat), "unit": "s"},
+    ]
+
+
+def bench_pos_selection(validator_counts, iterations, repeat):
+    results = []
+    rng = random.Random(42)
+    for count in validator_counts:
+        validators = [PoSNode(f"Node{i}", rng.randint(1, 100)) for i in range(count)]
+
+        def run():
+            for _ in range(iterations):
+                validators[0].select_block_producer(validators)
+
+        elapsed = best_of(run, repeat)
+        results.append({"name": "pos_select_block_producer", "params": {"validators": count}, "value": iterations / elapsed, "unit": "selections/s"})
+    return results
+
+
+def sign_transactions(count, wallets):
+    # 预先签名，签名耗时不计入被测的验证和接口吞吐；每个钱包的交易按 nonce 顺序排列
+    wallets = [Wallet() for _ in range(wallets)]
+    return [[wallet.sign_transaction(wallets[0].address, 1) for _ in range(count // len(wallets))] for wallet in wallets]
+
+
+def start_node(blockchain):
+    # 在本地线程中启动 Flask 节点，返回服务器和地址
+    node.blockchain = blockchain
+    server = make_server("127.0.0.1", 0, node.app, threaded=True, request_handler=QuietRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def post_transactions(base_url, transactions):
+    session = requests.Session()
+    for tx in transactions:
+        response = session.post(f"{base_url}/add_transaction", json=tx)
+        assert response.status_code == 201, f"/add_transaction returned {response.status_code}: {response.text}"
+
+
+def bench_http(requests_count, chain_length):
+    # 测量端到端请求吞吐（不校验签名的节点）
+    server, base_url = start_node(build_chain(chain_length, 5))
+    results = []
+    try:
+        transactions = [{"sender": "Alice", "recipient": "Bob", "amount": i + 1, "nonce": i} for i in range(requests_count)]
+        with quiet():
+            start = time.perf_counter()
+            post_transactions(base_url, transactions)
+            elapsed = time.perf_counter() - start
+        results.append({"name": "http_add_transaction", "params": {"requests": requests_count, "signed": False},
+                        "value": requests_count / elapsed, "unit": "requests/s"})
+
+        session = requests.Session()
+        start = time.perf_counter()
+        for _ in range(requests_count):
+            response = session.get(f"{base_url}/get_blocks")
+            assert response.status_code == 200, f"/get_blocks returned {response.status_code}"
+        elapsed = time.perf_counter() - start
+        results.append({"name": "http_get_blocks", "params": {"requests": requests_count, "chain_length": chain_length},
+                        "value": requests_count / elapsed, "unit": "requests/s"})
+    finally:
+        server.shutdown()
+    return results
+
+
+def bench_http_signed(requests_count, clients):
+    # 校验签名的节点：多个客户端并发提交已签名交易，签名验证流水线把它们攒成批
+    transactions = sign_transactions(requests_count, clients)
+    verifier = BatchVerifier()
+    verifier.verify_many(sign_transactions(1, 1)[0])  # 预先启动进程池，不计入计时
+    server, base_url = start_node(Blockchain(difficulty=1, verifier=verifier))
+    try:
+        with quiet(), ThreadPoolExecutor(clients) as executor:
+            start = time.perf_counter()
+            for future in [executor.submit(post_transactions, base_url, batch) for batch in transactions]:
+                future.result()
+            elapsed = time.perf_counter() - start
+    finally:
+        server.shutdown()
+        verifier.shutdown()
+    total = sum(len(batch) for batch in transactions)
+    return [{"name": "http_add_transaction", "params": {"requests": total, "signed": True, "clients": clients},
+             "value": total / elapsed, "unit": "requests/s"}]
+
+
+def bench_verify_many(batch_sizes, count):
+    # 签名验证吞吐随批大小的变化，每次使用新的验证器，缓存不会命中
+    transactions = [tx for batch in sign_transactions(count, 4) for tx in batch]
+    results = []
+    for batch_size in batch_sizes:
+        verifier = BatchVerifier(batch_size=batch_size)
+        verifier.verify_many(sign_transactions(1, 1)[0])  # 预先启动进程池
+        start = time.perf_counter()
+        valid = verifier.verify_many(transactions)
+        elapsed = time.perf_counter() - start
+        verifier.shutdown()
+        assert all(valid), "verify_many rejected a valid signature"
+        results.append({"name": "verify_many", "params": {"batch_size": batch_size, "transactions": len(transactions)},
+                        "value": len(transactions) / elapsed, "unit": "signatures/s"})
+    return results
+
+
+def run_all(quick=False):
+    if quick:
+        block_sizes, difficulties, chain_lengths = [1, 10], [1, 2], [10, 50]
+        iterations, repeat, rounds, requests_count = 1000, 3, 3, 50
+    else:
+        block_sizes, difficulties, chain_lengths = [1, 10, 100], [1, 2, 3, 4], [10, 100, 500]
+        iterations, repeat, rounds, requests_count = 5000, 5, 5, 500
+
+    results = []
+    results += bench_calculate_hash(block_sizes, iterations, repeat)
+    results += bench_mine_block(difficulties, block_sizes, rounds)
+    results += bench_is_valid(chain_lengths, 10, repeat)
+    results += bench_serialization(chain_lengths[-1], 10, repeat)
+    results += bench_pos_selection([10, 100, 1000], iterations, repeat)
+    results += bench_http(requests_count, chain_lengths[-1])
+    results += bench_http_signed(requests_count, 8)
+    results += bench_verify_many([1, 8, 32, 128], requests_count)
+    return results
+
+
+def result_key(result):
+    return result["name"] + json.dumps(result["params"], sort_keys=True)
+
+
+def compare(old_results, new_results):
+    # 打印两次运行同一项目的变化比例
+    old = {result_key(result): result for result in old_results}
+    for result in new_results:
+        previous = old.get(result_key(result))
+        if previous is None or not previous["value"]:
+            continue
+        change = (result["value"] - previous["value"]) / previous["value"] * 100
+        print(f"{result['name']:<28} {json.dumps(result['params'], sort_keys=True):<45} "
+              f"{previous['value']:>14.4f} -> {result['value']:>14.4f} {result['unit']} ({change:+.1f}%)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Blockchain benchmark suite")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON file to write results to")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    parser.add_argument("--quick", action="store_true", help="smaller parameters for a fast run")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    results = run_all(quick=args.quick)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": int(time.time()),
+            "quick": args.quick,
+            "seed": args.seed
+        },
+        "results": results
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for result in results:
+        print(f"{result['name']:<28} {json.dumps(result['params'], sort_keys=True):<45} {result['value']:>14.4f} {result['unit']}")
+    if args.compare:
+        with open(args.compare) as f:
+            previous_report = json.load(f)
+        print("\nComparison with", args.compare)
+        compare(previous_report["results"], results)
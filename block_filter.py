@@ -0,0 +1,54 @@
+import hashlib
+import math
+
+
+class BloomFilter:
+    # 布隆过滤器：可能误报但不会漏报，钱包用它判断区块是否可能涉及某个地址
+    def __init__(self, n_bits, n_hashes, key="", bits=None):
+        self.n_bits = n_bits
+        self.n_hashes = n_hashes
+        self.key = key  # 以区块哈希作为盐，不同区块的误报互不相关
+        self.bits = bits if bits is not None else bytearray((n_bits + 7) // 8)
+
+    @classmethod
+    def for_items(cls, items, key="", false_positive_rate=0.01):
+        # 根据元素个数和目标误报率确定位数和哈希函数个数
+        items = set(items)
+        n = max(len(items), 1)
+        n_bits = max(8, int(math.ceil(-n * math.log(false_positive_rate) / (math.log(2) ** 2))))
+        n_hashes = max(1, int(round(n_bits / n * math.log(2))))
+        bloom = cls(n_bits, n_hashes, key)
+        for item in items:
+            bloom.add(item)
+        return bloom
+
+    def _positions(self, item):
+        digest = hashlib.sha256(f"{self.key}:{item}".encode('utf-8')).digest()
+        # 双重哈希：用两个 64 位值组合出 k 个位置
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:16], 'big') | 1
+        return [(h1 + i * h2) % self.n_bits for i in range(self.n_hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position // 8] |= 1 << (position % 8)
+
+    def __contains__(self, item):
+        return all(self.bits[position // 8] & (1 << (position % 8)) for position in self._positions(item))
+
+    def to_dict(self):
+        return {"n_bits": self.n_bits, "n_hashes": self.n_hashes, "bits": self.bits.hex()}
+
+    @classmethod
+    def from_dict(cls, data, key=""):
+        return cls(data["n_bits"], data["n_hashes"], key, bytearray.fromhex(data["bits"]))
+
+
+def build_address_filter(block_hash, transactions):
+    # 区块过滤器：覆盖区块内所有交易的发送方和接收方
+    addresses = []
+    for tx in transactions:
+        tx = tx if isinstance(tx, dict) else tx.__dict__
+        addresses.append(tx["sender"])
+        addresses.append(tx["recipient"])
+    return BloomFilter.for_items(addresses, key=block_hash)
@@ -0,0 +1,48 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import weakref
+
+
+class SegmentStore:
+    # 冷存储：把旧区块的交易体按索引区间写入压缩的分段文件，按需读取
+    def __init__(self, directory, segment_size=100):
+        self.segment_size = segment_size
+        os.makedirs(directory, exist_ok=True)
+        # 每个存储独占 directory 下新建的子目录，同一进程或同一工作目录中的多条链不会读到彼此的交易体；
+        # 分段只是内存中区块的冷备份，存储对象回收或进程退出时删除
+        self.directory = tempfile.mkdtemp(prefix="chain_", dir=directory)
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.directory, True)
+        # 只缓存最近读取的一个分段，内存占用不随链高度增长
+        self._cached_segment = None
+        self._cached_bodies = {}
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f"segment_{segment:06d}.jsonl.gz")
+
+    def put(self, index, transactions):
+        # 以追加方式写入一行 JSON，gzip 支持多段拼接，无需重写整个分段
+        segment = index // self.segment_size
+        with gzip.open(self._segment_path(segment), 'at', encoding='utf-8') as f:
+            f.write(json.dumps({"index": index, "transactions": transactions}) + "\n")
+        if segment == self._cached_segment:
+            self._cached_bodies[index] = transactions
+
+    def get(self, index):
+        # 懒加载：访问到某个区块时才读取它所在的分段
+        segment = index // self.segment_size
+        if segment != self._cached_segment:
+            bodies = {}
+            path = self._segment_path(segment)
+            if os.path.exists(path):
+                with gzip.open(path, 'rt', encoding='utf-8') as f:
+                    for line in f:
+                        record = json.loads(line)
+                        bodies[record["index"]] = record["transactions"]
+            self._cached_segment = segment
+            self._cached_bodies = bodies
+        if index not in self._cached_bodies:
+            raise KeyError(f"Block {index} body not found in segment store")
+        return self._cached_bodies[index]
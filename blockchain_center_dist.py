@@ -1,15 +1,35 @@
+import argparse
 import hashlib
+import math
 import time
 import threading
 import json
 import requests
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g
+from snapshot import write_snapshot, read_snapshot, snapshot_hash, SnapshotError
+from block_store import SegmentStore
+from cache import LRUCache
+from merkle import transaction_hash, header_hash, merkle_root, merkle_proof
+from block_filter import build_address_filter
+from transport import HttpTransport
+from verifier import BatchVerifier
+from wallet import Wallet, transaction_id
+import metrics
+import profiler
+import node_log as log
+
+MINING_REWARD = 50  # 每个区块最后一笔交易奖励矿工的固定金额
 
 class Transaction:
-    def __init__(self, sender, recipient, amount):
-        self.sender = sender
+    def __init__(self, sender, recipient, amount, nonce=0, signature=None):
+        self.sender = sender  # 发送方地址（Ed25519 公钥的十六进制），挖矿奖励为 "System"
         self.recipient = recipient
         self.amount = amount
+        self.nonce = nonce
+        self.signature = signature  # 发送方对交易内容的签名，挖矿奖励交易没有签名
+
+    def txid(self):
+        return transaction_id(self.__dict__)
 
     def __repr__(self):
         return f"Transaction(sender={self.sender}, recipient={self.recipient}, amount={self.amount})"
@@ -19,9 +39,38 @@ class Block:
         self.index = index  # 区块的索引
         self.previous_hash = previous_hash  # 前一个区块的哈希
         self.timestamp = timestamp  # 区块创建时间
+        self._body_loader = None  # 交易体被裁剪到冷存储后用于懒加载
         self.transactions = transactions  # 区块内的交易列表
+        self.merkle_root = merkle_root(self.transaction_hashes())  # 交易的默克尔根，写入区块头
         self.hash = hash  # 当前区块的哈希
         self.nonce = nonce  # 工作量证明的随机数
+        self.address_filter = build_address_filter(hash, self.transactions)  # 发送方/接收方的紧凑过滤器
+
+    @property
+    def transactions(self):
+        if self._transactions is None:
+            return self._body_loader(self.index)
+        return self._transactions
+
+    @transactions.setter
+    def transactions(self, transactions):
+        self._transactions = transactions
+
+    def prune(self, body_loader):
+        # 释放内存中的交易体，只保留区块头，之后访问交易时从冷存储加载
+        self._transactions = None
+        self._body_loader = body_loader
+
+    def is_pruned(self):
+        return self._transactions is None
+
+    def transaction_hashes(self):
+        return [transaction_hash(tx if isinstance(tx, dict) else tx.__dict__) for tx in self.transactions]
+
+    def has_duplicate_transactions(self):
+        # 同一笔交易在区块中出现多次会被重复记账
+        hashes = self.transaction_hashes()
+        return len(set(hashes)) != len(hashes)
 
     def __repr__(self):
         return f"Block(index={self.index}, hash={self.hash}, previous_hash={self.previous_hash}, transactions={self.transactions}, nonce={self.nonce})"
@@ -37,78 +86,205 @@ class Block:
             "nonce": self.nonce
         }
 
+    def header(self):
+        # 区块头：不含交易体，轻节点只需同步这部分
+        return {
+            "index": self.index,
+            "previous_hash": self.previous_hash,
+            "timestamp": self.timestamp,
+            "merkle_root": self.merkle_root,
+            "hash": self.hash,
+            "nonce": self.nonce
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """从 to_dict 的结果还原区块，交易还原为 Transaction 对象以保证哈希一致"""
+        transactions = [Transaction(**tx) if isinstance(tx, dict) else tx for tx in data["transactions"]]
+        return cls(data["index"], data["previous_hash"], data["timestamp"], transactions, data["hash"], data["nonce"])
+
 class Blockchain:
-    def __init__(self, difficulty=4):
+    def __init__(self, difficulty=4, prune_depth=None, store_dir="block_segments", verifier=None):
         self.chain = []  # 存储区块链
         self.pending_transactions = []  # 存储待处理的交易
         self.difficulty = difficulty  # 工作量证明的难度
+        # 裁剪模式：只在内存中保留最近 prune_depth 个区块的交易体，None 表示不裁剪
+        if prune_depth is not None and prune_depth < 0:
+            raise ValueError(f"prune_depth must be non-negative, got {prune_depth}")
+        self.prune_depth = prune_depth
+        self.block_store = SegmentStore(store_dir) if prune_depth is not None else None
+        # 签名验证流水线，None 表示不校验签名
+        self.verifier = verifier
+        self.balances = {}  # 派生状态：地址余额
+        self.address_index = {}  # 派生状态：地址 -> 涉及的区块索引
+        self.nonces = {}  # 派生状态：发送方 -> 已上链的最大 nonce，防止同一笔签名交易被重放
+        self.lock = threading.Lock()  # 交易的检查和加入交易池需要原子完成
         self.create_genesis_block()  # 创建创世区块（第一个区块）
+        self.checkpoint = {"height": 0, "hash": self.chain[0].hash}  # 已验证高度的检查点
         self.nodes = set()  # 存储网络中其他节点的地址
+        self.transport = HttpTransport()  # 向其他节点发送消息的传输层，模拟器中可替换
+        self.clock = time.time  # 时间来源，模拟器中替换为模拟时钟
 
     def create_genesis_block(self):
         # 创世区块（第一个区块）
         genesis_block = Block(0, "0", int(time.time()), [], self.calculate_hash(0, "0", int(time.time()), [], 0), 0)
         self.chain.append(genesis_block)
 
+    def append_block(self, block):
+        # 将区块加入链中，并更新余额和地址索引
+        self.chain.append(block)
+        for tx in block.transactions:
+            if tx.sender != "System":
+                self.balances[tx.sender] = self.balances.get(tx.sender, 0) - tx.amount
+                self.nonces[tx.sender] = max(self.nonces.get(tx.sender, -1), tx.nonce)
+            self.balances[tx.recipient] = self.balances.get(tx.recipient, 0) + tx.amount
+            for address in (tx.sender, tx.recipient):
+                indexes = self.address_index.setdefault(address, [])
+                if not indexes or indexes[-1] != block.index:
+                    indexes.append(block.index)
+        # 交易池中 nonce 已被上链交易用过的交易（包括刚打包的）不能再打包；
+        # 在锁内替换交易池，挖矿期间新加入的交易不会丢失
+        with self.lock:
+            self.pending_transactions = [tx for tx in self.pending_transactions
+                                         if tx.sender == "System" or tx.nonce > self.nonces.get(tx.sender, -1)]
+        metrics.MEMPOOL_SIZE.set(len(self.pending_transactions))
+        self.prune_old_blocks()
+
+    def prune_old_blocks(self):
+        # 把超出保留深度的区块交易体移到压缩分段文件中
+        if self.prune_depth is None:
+            return
+        # 从保留窗口外最新的区块往前处理，遇到已裁剪的区块即可停止
+        position = len(self.chain) - self.prune_depth - 1
+        while position >= 0 and not self.chain[position].is_pruned():
+            block = self.chain[position]
+            self.block_store.put(block.index, [tx.__dict__ for tx in block.transactions])
+            block.prune(self.load_block_body)
+            position -= 1
+
+    def load_block_body(self, index):
+        return [Transaction(**tx) for tx in self.block_store.get(index)]
+
     def calculate_hash(self, index, previous_hash, timestamp, transactions, nonce):
-        # 计算区块的哈希值
-        block_string = f"{index}{previous_hash}{timestamp}{[str(tx) for tx in transactions]}{nonce}".encode('utf-8')
-        return hashlib.sha256(block_string).hexdigest()
-
-    def add_transaction(self, sender, recipient, amount):
-        # 添加交易到待处理交易池
-        transaction = Transaction(sender, recipient, amount)
-        self.pending_transactions.append(transaction)
-        print(f"Transaction added: {transaction}")
-
-    def mine_block(self, miner_address)->Block:
-        # 挖矿：获取当前待处理交易的列表并创建新区块
-        if not self.pending_transactions:
+        # 计算区块的哈希值：交易先汇总为默克尔根，再对区块头做哈希
+        root = merkle_root([transaction_hash(tx if isinstance(tx, dict) else tx.__dict__) for tx in transactions])
+        return header_hash(index, previous_hash, timestamp, root, nonce)
+
+    def transaction_error(self, tx, last_nonce):
+        # 检查交易金额和 nonce，返回拒绝原因，None 表示通过
+        # 同一发送方的 nonce 必须严格递增，重放已上链或已在交易池中的交易会被拒绝
+        amount = tx.amount
+        if isinstance(amount, bool) or not isinstance(amount, (int, float)) or not math.isfinite(amount) or amount <= 0:
+            return "Invalid amount"
+        if isinstance(tx.nonce, bool) or not isinstance(tx.nonce, int):
+            return "Invalid nonce"
+        if tx.nonce <= last_nonce:
+            return "Nonce already used"
+        return None
+
+    def last_nonce(self, sender):
+        # 发送方已上链和交易池中交易的最大 nonce，没有则为 -1
+        pending = [tx.nonce for tx in self.pending_transactions if tx.sender == sender]
+        return max([self.nonces.get(sender, -1)] + pending)
+
+    def add_transaction(self, sender, recipient, amount, nonce=0, signature=None):
+        # 添加交易到待处理交易池（签名在进入交易池之前由接口校验），返回是否加入
+        # 挖矿奖励由 mine_block 生成，不能通过交易池提交
+        transaction = Transaction(sender, recipient, amount, nonce, signature)
+        with self.lock:
+            error = "Reward transactions cannot be submitted" if sender == "System" else \
+                self.transaction_error(transaction, self.last_nonce(sender))
+            if error is not None:
+                log.warning(f"Transaction rejected ({error}): {transaction}")
+                return False
+            self.pending_transactions.append(transaction)
+        metrics.MEMPOOL_SIZE.set(len(self.pending_transactions))
+        log.debug(f"Transaction added: {transaction}")
+        return True
+
+    def mine_block(self, miner_address, allow_empty=False)->Block:
+        # 挖矿：获取当前待处理交易的列表并创建新区块，allow_empty 时没有交易也出块（只含挖矿奖励）
+        if not self.pending_transactions and not allow_empty:
             return False
 
         # 挖矿的过程：通过工作量证明找到合适的 nonce
         last_block = self.chain[-1]
         new_index = last_block.index + 1
-        timestamp = int(time.time())
-        transactions_to_mine = self.pending_transactions
+        timestamp = int(self.clock())
+        # 奖励矿工：挖矿奖励作为区块的最后一笔交易
+        transactions_to_mine = self.pending_transactions + [Transaction("System", miner_address, MINING_REWARD)]
         nonce = 0
+        start = time.perf_counter()
 
         # 不断计算哈希直到找到符合条件的哈希值（前面有指定数量的零）
-        new_hash = self.calculate_hash(new_index, last_block.hash, timestamp, transactions_to_mine, nonce)
-        while not new_hash.startswith('0' * self.difficulty):
-            nonce += 1
-            new_hash = self.calculate_hash(new_index, last_block.hash, timestamp, transactions_to_mine, nonce)
+        # 默克尔根与 nonce 无关，只需计算一次
+        with profiler.section("mining"):
+            root = merkle_root([transaction_hash(tx.__dict__) for tx in transactions_to_mine])
+            new_hash = header_hash(new_index, last_block.hash, timestamp, root, nonce)
+            while not new_hash.startswith('0' * self.difficulty):
+                nonce += 1
+                new_hash = header_hash(new_index, last_block.hash, timestamp, root, nonce)
+
+        elapsed = time.perf_counter() - start
+        metrics.HASHES.inc(nonce + 1)
+        metrics.MINING_DURATION.observe(elapsed)
+        if elapsed > 0:
+            metrics.HASH_RATE.set((nonce + 1) / elapsed)
 
         # 创建新区块并加入链中
         new_block = Block(new_index, last_block.hash, timestamp, transactions_to_mine, new_hash, nonce)
-        self.chain.append(new_block)
-
-        # 清空交易池
-        self.pending_transactions = []
-
-        # 奖励矿工
-        self.add_transaction("System", miner_address, 50)  # 假设矿工奖励为50个单位
+        # append_block 会从交易池中移除已打包的交易
+        self.append_block(new_block)
 
         # 打印挖矿完成的信息
-        print(f"Mining completed. Block mined: {new_block}")
+        log.info(f"Mining completed. Block mined: {new_block}")
         return new_block
 
     def is_valid(self):
         # 验证区块链的有效性
-        for i in range(1, len(self.chain)):
-            current_block = self.chain[i]
-            previous_block = self.chain[i - 1]
-
-            # 校验当前区块的哈希是否匹配
-            if current_block.hash != self.calculate_hash(current_block.index, current_block.previous_hash, current_block.timestamp, current_block.transactions, current_block.nonce):
-                return False
-
-            # 校验当前区块的前哈希是否匹配
-            if current_block.previous_hash != previous_block.hash:
+        with metrics.VALIDATION_DURATION.time(), profiler.section("validation"):
+            nonces = {}  # 从链上第一个区块开始重放的 nonce
+            for i in range(1, len(self.chain)):
+                current_block = self.chain[i]
+                previous_block = self.chain[i - 1]
+
+                # 校验当前区块的哈希是否匹配
+                if current_block.hash != self.calculate_hash(current_block.index, current_block.previous_hash, current_block.timestamp, current_block.transactions, current_block.nonce):
+                    return False
+
+                # 校验当前区块的前哈希是否匹配
+                if current_block.previous_hash != previous_block.hash:
+                    return False
+
+                if current_block.has_duplicate_transactions():
+                    return False
+
+                if not self.validate_transactions(current_block.transactions, nonces):
+                    return False
+
+            # 所有区块的签名一起交给验证流水线，已验证过的交易直接跳过
+            return self.verify_signatures([tx for block in self.chain[1:] for tx in block.transactions])
+
+    def validate_transactions(self, transactions, nonces):
+        # 按顺序检查区块内交易的金额和 nonce，nonces 随之更新
+        for position, tx in enumerate(transactions):
+            if tx.sender == "System":
+                # 每个区块最多一笔挖矿奖励：金额固定，且必须是最后一笔
+                if position != len(transactions) - 1 or tx.amount != MINING_REWARD:
+                    return False
+                continue
+            if self.transaction_error(tx, nonces.get(tx.sender, -1)) is not None:
                 return False
-
+            nonces[tx.sender] = tx.nonce
         return True
 
+    def verify_signatures(self, transactions):
+        # 校验除挖矿奖励外所有交易的签名
+        if self.verifier is None:
+            return True
+        signed = [tx.__dict__ for tx in transactions if tx.sender != "System"]
+        return all(self.verifier.verify_many(signed))
+
     def add_node(self, node_address):
         # 向区块链网络中添加新节点
         self.nodes.add(node_address)
@@ -116,10 +292,13 @@ class Blockchain:
     def broadcast_new_block(self, block:Block):
         # 将新区块广播到网络中的其他节点
         for node in self.nodes:
+            start = time.perf_counter()
             try:
-                requests.post(f"http://{node}/add_block", json=block.to_dict())
+                # 附带发送时间，接收方据此统计区块传播延迟
+                self.transport.send(node, {"type": "block", "block": block.to_dict(), "sent_at": self.clock()})
             except requests.exceptions.RequestException as e:
-                print(f"Error broadcasting to {node}: {e}")
+                log.warning(f"Error broadcasting to {node}: {e}")
+            metrics.PEER_SEND_LATENCY.observe(time.perf_counter() - start, peer=node)
 
     def sync_chain(self):
         # 从其他节点拉取区块链数据
@@ -131,18 +310,197 @@ class Blockchain:
                     if len(new_chain) > len(self.chain):
                         self.chain = new_chain
             except requests.exceptions.RequestException as e:
-                print(f"Error syncing with {node}: {e}")
+                log.warning(f"Error syncing with {node}: {e}")
+
+    def save_snapshot(self, path):
+        # 保存快照：链尖、检查点和派生状态，新节点无需重放整条链
+        # 返回快照哈希，需要通过可信渠道交给从该快照启动的节点
+        tip = self.chain[-1]
+        return write_snapshot(path, {
+            "tip": tip.to_dict(),
+            "checkpoint": {"height": tip.index, "hash": tip.hash},
+            "balances": self.balances,
+            "address_index": self.address_index,
+            "nonces": self.nonces
+        })
+
+    def load_snapshot(self, path, trusted_hash):
+        # 从快照启动：trusted_hash 是 save_snapshot 返回的快照哈希，覆盖链尖和全部派生状态，
+        # 只校验链尖哈希无法发现被篡改的余额或索引
+        state = read_snapshot(path)
+        if snapshot_hash(state) != trusted_hash:
+            raise SnapshotError(f"Snapshot hash does not match trusted hash {trusted_hash}")
+        tip = Block.from_dict(state["tip"])
+        if tip.hash != self.calculate_hash(tip.index, tip.previous_hash, tip.timestamp, tip.transactions, tip.nonce):
+            raise SnapshotError("Snapshot tip hash is invalid")
+        if state["checkpoint"] != {"height": tip.index, "hash": tip.hash}:
+            raise SnapshotError("Snapshot checkpoint does not match tip")
+
+        self.chain = [tip]
+        self.checkpoint = state["checkpoint"]
+        self.balances = state["balances"]
+        self.address_index = {address: list(indexes) for address, indexes in state["address_index"].items()}
+        self.nonces = state["nonces"]
+
+    def sync_new_blocks(self):
+        # 只拉取本地链尖之后的区块，校验连接关系和工作量证明后追加
+        for node in self.nodes:
+            try:
+                response = requests.get(f"http://{node}/get_blocks", params={"from": self.chain[-1].index + 1})
+                if response.status_code != 200:
+                    continue
+                for data in response.json()["blocks"]:
+                    block = Block.from_dict(data)
+                    if not self.validate_next_block(block):
+                        break
+                    self.append_block(block)
+            except requests.exceptions.RequestException as e:
+                log.warning(f"Error syncing with {node}: {e}")
+
+    def validate_next_block(self, block):
+        # 校验区块能否接在本地链尖之后：连接关系、工作量证明和哈希
+        with metrics.VALIDATION_DURATION.time(), profiler.section("validation"):
+            last_block = self.chain[-1]
+            if block.index != last_block.index + 1 or block.previous_hash != last_block.hash:
+                return False
+            if not block.hash.startswith('0' * self.difficulty):
+                return False
+            if block.hash != self.calculate_hash(block.index, block.previous_hash, block.timestamp, block.transactions, block.nonce):
+                return False
+            if block.has_duplicate_transactions():
+                return False
+            if not self.validate_transactions(block.transactions, dict(self.nonces)):
+                return False
+            return self.verify_signatures(block.transactions)
+
+    def receive_block(self, data, sent_at=None):
+        # 接收其他节点广播的区块，能接在链尖之后才追加，返回区块或 None
+        if sent_at is not None:
+            metrics.BLOCK_PROPAGATION.observe(max(self.clock() - sent_at, 0))
+        block = Block.from_dict(data)
+        if not self.validate_next_block(block):
+            return None
+        self.append_block(block)
+        log.info(f"Block added: {block}")
+        return block
+
+    def bootstrap(self, snapshot_path, trusted_hash):
+        # 快速启动：加载快照后只同步快照之后的区块
+        self.load_snapshot(snapshot_path, trusted_hash)
+        self.sync_new_blocks()
 
 
 # Flask Web 服务来模拟区块链节点
 app = Flask(__name__)
-blockchain = Blockchain()
+blockchain = Blockchain(verifier=BatchVerifier())
+
+# 已确认的区块不会再改变，按区块哈希缓存其序列化结果
+block_cache = LRUCache(maxsize=1024)
+# 按区间缓存整段响应，链尖变化时整体失效；整条链的响应可能很大（包括已裁剪的交易体），
+# 因此按响应体的总字节数限制，避免内存重新随链高度增长
+response_cache = LRUCache(maxsize=64, maxbytes=16 * 1024 * 1024, sizeof=lambda cached: len(cached[0]))
+response_cache_tip = None
+# /get_headers 单次响应的区块头数量上限
+MAX_HEADERS = 2000
+# /filters 单次响应的过滤器数量上限
+MAX_FILTERS = 2000
+
+def serialize_block(block):
+    data = block_cache.get(block.hash)
+    if data is None:
+        data = json.dumps(block.to_dict(), sort_keys=True)
+        block_cache.put(block.hash, data)
+    return data
+
+def block_range(start, end):
+    # 把 from/to 区块索引参数换算为链表中的位置区间，to 包含在内
+    base = blockchain.chain[0].index
+    start_position = max(start - base, 0) if start is not None else 0
+    end_position = max(end - base + 1, 0) if end is not None else len(blockchain.chain)
+    return start_position, end_position
+
+def cached_blocks_response(field, start_position, end_position=None):
+    # 返回区块列表响应，带 ETag，客户端携带 If-None-Match 且未变化时返回 304
+    global response_cache_tip
+    # 先复制链，链尖和响应体来自同一个快照；其他线程此时追加区块也不会把旧响应体存到新链尖下
+    chain = blockchain.chain[:]
+    tip_hash = chain[-1].hash
+    if tip_hash != response_cache_tip:
+        response_cache.clear()
+        response_cache_tip = tip_hash
+
+    cache_key = (tip_hash, field, start_position, end_position)
+    cached = response_cache.get(cache_key)
+    if cached is None:
+        blocks = ", ".join(serialize_block(block) for block in chain[start_position:end_position])
+        body = f'{{"{field}": [{blocks}]}}'
+        etag = hashlib.sha256(f"{tip_hash}:{field}:{start_position}:{end_position}".encode('utf-8')).hexdigest()
+        cached = (body, etag)
+        response_cache.put(cache_key, cached)
+
+    body, etag = cached
+    response = app.response_class(body, mimetype="application/json")
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    endpoint = request.url_rule.rule if request.url_rule else "unknown"
+    metrics.REQUEST_LATENCY.observe(time.perf_counter() - g.request_start, endpoint=endpoint)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return app.response_class(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+def parse_transaction(data):
+    return {"sender": data['sender'], "recipient": data['recipient'], "amount": data['amount'],
+            "nonce": data.get('nonce', 0), "signature": data.get('signature')}
 
 @app.route('/add_transaction', methods=['POST'])
 def add_transaction():
-    data = request.get_json()
-    blockchain.add_transaction(data['sender'], data['recipient'], data['amount'])
-    return jsonify({"message": "Transaction added lalala"}), 201
+    tx = parse_transaction(request.get_json())
+    if tx["sender"] == "System":
+        return jsonify({"message": "Reward transactions cannot be submitted"}), 400
+    # 先做廉价的金额和 nonce 检查，重放的交易不会进入签名验证
+    error = blockchain.transaction_error(Transaction(**tx), blockchain.last_nonce(tx["sender"]))
+    if error is not None:
+        return jsonify({"message": error}), 400
+    if blockchain.verifier is not None:
+        # 并发到达的交易会被攒成一批验证
+        if not blockchain.verifier.submit(tx).result():
+            return jsonify({"message": "Invalid signature"}), 400
+    if not blockchain.add_transaction(**tx):
+        return jsonify({"message": "Nonce already used"}), 400
+    return jsonify({"message": "Transaction added lalala", "txid": transaction_id(tx)}), 201
+
+@app.route('/add_transactions', methods=['POST'])
+def add_transactions():
+    # 批量提交交易：先做廉价的金额和 nonce 检查，再把通过的交易整批并行验证签名
+    transactions = [parse_transaction(data) for data in request.get_json()['transactions']]
+    candidates = []
+    last_nonces = {}  # 同一批中同一发送方的 nonce 也必须递增
+    for tx in transactions:
+        if tx["sender"] == "System":
+            continue
+        last_nonce = last_nonces.get(tx["sender"], blockchain.last_nonce(tx["sender"]))
+        if blockchain.transaction_error(Transaction(**tx), last_nonce) is None:
+            candidates.append(tx)
+            last_nonces[tx["sender"]] = tx["nonce"]
+    if blockchain.verifier is not None:
+        results = blockchain.verifier.verify_many(candidates)
+    else:
+        results = [True] * len(candidates)
+    accepted = []
+    for tx, valid in zip(candidates, results):
+        if valid and blockchain.add_transaction(**tx):
+            accepted.append(transaction_id(tx))
+    status = 201 if accepted else 400
+    return jsonify({"message": f"{len(accepted)} of {len(transactions)} transactions added", "txids": accepted}), status
 
 @app.route('/mine', methods=['POST'])
 def mine():
@@ -158,14 +516,14 @@ def mine():
 @app.route('/add_block', methods=['POST'])
 def add_block():
     data = request.get_json()
-    block = Block(**data)
-    blockchain.chain.append(block)
-    print(f"Block added: {block}")
+    sent_at = float(request.headers["X-Sent-At"]) if "X-Sent-At" in request.headers else None
+    if blockchain.receive_block(data, sent_at) is None:
+        return jsonify({"message": "Block rejected"}), 400
     return jsonify({"message": "Block added"}), 201
 
 @app.route('/get_chain', methods=['GET'])
 def get_chain():
-    return jsonify({"chain": [block.__dict__ for block in blockchain.chain]}), 200
+    return cached_blocks_response("chain", 0)
 
 @app.route('/add_node', methods=['POST'])
 def add_node():
@@ -175,8 +533,68 @@ def add_node():
 
 @app.route('/get_blocks', methods=['GET'])
 def get_blocks():
-    # 返回所有区块
-    return jsonify({"blocks": [block.to_dict() for block in blockchain.chain]}), 200
+    # 返回所有区块，可通过 from/to 参数只返回该索引区间内的区块
+    start_position, end_position = block_range(request.args.get("from", type=int), request.args.get("to", type=int))
+    return cached_blocks_response("blocks", start_position, end_position)
+
+@app.route('/get_headers', methods=['GET'])
+def get_headers():
+    # 只返回区块头，供轻节点同步；按 from/to 分页，每次最多 MAX_HEADERS 个
+    start_position, end_position = block_range(request.args.get("from", type=int), request.args.get("to", type=int))
+    end_position = min(end_position, start_position + MAX_HEADERS)
+    return jsonify({"headers": [block.header() for block in blockchain.chain[start_position:end_position]]}), 200
+
+@app.route('/get_proof', methods=['GET'])
+def get_proof():
+    # 返回某笔交易在指定区块中的默克尔包含证明
+    # txid 与 /add_transaction 返回的相同（不含签名），证明的叶子是含签名的交易哈希，客户端用完整交易自行计算
+    index = request.args.get("index", type=int)
+    txid = request.args.get("txid")
+    position = index - blockchain.chain[0].index if index is not None else -1
+    if not 0 <= position < len(blockchain.chain):
+        return jsonify({"message": "Block not found"}), 404
+    block = blockchain.chain[position]
+    txids = [tx.txid() for tx in block.transactions]
+    if txid not in txids:
+        return jsonify({"message": "Transaction not found in block"}), 404
+    return jsonify({
+        "index": block.index,
+        "txid": txid,
+        "merkle_root": block.merkle_root,
+        "proof": merkle_proof(block.transaction_hashes(), txids.index(txid))
+    }), 200
+
+@app.route('/filters', methods=['GET'])
+def get_filters():
+    # 返回区块过滤器，钱包只下载过滤器，再按匹配结果拉取对应区块；按 from/to 分页，每次最多 MAX_FILTERS 个
+    start_position, end_position = block_range(request.args.get("from", type=int), request.args.get("to", type=int))
+    end_position = min(end_position, start_position + MAX_FILTERS)
+    return jsonify({"filters": [
+        {"index": block.index, "hash": block.hash, "filter": block.address_filter.to_dict()}
+        for block in blockchain.chain[start_position:end_position]
+    ]}), 200
+
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    stats = {"block_cache": block_cache.stats(), "response_cache": response_cache.stats()}
+    if blockchain.verifier is not None:
+        stats["verified_txids"] = blockchain.verifier.verified.stats()
+    return jsonify(stats), 200
+
+@app.route('/snapshot', methods=['POST'])
+def save_snapshot():
+    # 把当前状态写入启动时配置的快照文件，返回快照哈希供其他节点从该快照启动
+    path = app.config.get("SNAPSHOT_PATH")
+    if path is None:
+        return jsonify({"message": "Snapshots are not enabled on this node"}), 404
+    trusted_hash = blockchain.save_snapshot(path)
+    return jsonify({"path": path, "height": blockchain.chain[-1].index, "snapshot_hash": trusted_hash}), 201
+
+def non_negative_int(value):
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be non-negative, got {value}")
+    return number
 
 # 启动 Flask Web 服务
 def run_node(port):
@@ -184,6 +602,28 @@ def run_node(port):
 
 # 启动三个节点
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Blockchain node")
+    parser.add_argument("--snapshot", help="start from this snapshot file instead of replaying the chain")
+    parser.add_argument("--snapshot-hash", help="trusted snapshot hash, required with --snapshot")
+    parser.add_argument("--peer", action="append", default=[], help="peer (host:port) to sync blocks from after the snapshot")
+    parser.add_argument("--save-snapshot", help="file written by POST /snapshot")
+    parser.add_argument("--prune-depth", type=non_negative_int, help="keep transaction bodies only for the last N blocks in memory")
+    parser.add_argument("--store-dir", default="block_segments", help="directory for pruned block segments")
+    args = parser.parse_args()
+
+    if args.prune_depth is not None:
+        # 裁剪模式：内存占用由保留深度决定，不随链高度增长
+        blockchain = Blockchain(prune_depth=args.prune_depth, store_dir=args.store_dir, verifier=BatchVerifier())
+
+    app.config["SNAPSHOT_PATH"] = args.save_snapshot
+    for peer in args.peer:
+        blockchain.add_node(peer)
+    if args.snapshot:
+        if not args.snapshot_hash:
+            parser.error("--snapshot requires --snapshot-hash")
+        # 从快照启动，只同步快照之后的区块
+        blockchain.bootstrap(args.snapshot, args.snapshot_hash)
+
     # 启动节点1
     node_thread_1 = threading.Thread(target=run_node, args=(5000,))
     node_thread_1.start()
@@ -196,10 +636,12 @@ if __name__ == "__main__":
     node_thread_3 = threading.Thread(target=run_node, args=(5002,))
     node_thread_3.start()
 
-    # 添加一些初始交易
-    blockchain.add_transaction("Alice", "Bob", 10)
-    blockchain.add_transaction("Bob", "Charlie", 20)
-    blockchain.add_transaction("Charlie", "Alice", 30)
+    # 添加一些初始交易（由各自的钱包签名）
+    alice, bob, charlie = Wallet(), Wallet(), Wallet()
+    for tx in (alice.sign_transaction(bob.address, 10),
+               bob.sign_transaction(charlie.address, 20),
+               charlie.sign_transaction(alice.address, 30)):
+        blockchain.add_transaction(**tx)
 
     # 模拟三个用户参与挖矿
     blockchain.add_node("localhost:5000")
@@ -0,0 +1,56 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    # 有界的 LRU 缓存，记录命中和未命中次数
+    # maxbytes 不为 None 时还按 sizeof(value) 之和限制总大小，超过上限的单个值不缓存
+    def __init__(self, maxsize=1024, maxbytes=None, sizeof=len):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.sizeof = sizeof
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._sizes = {}  # 键 -> 值的大小
+        self._lock = threading.Lock()  # Flask 多线程处理请求时保护缓存
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        size = self.sizeof(value) if self.maxbytes is not None else 0
+        with self._lock:
+            if key in self._data:
+                self.bytes -= self._sizes.pop(key)
+                del self._data[key]
+            if self.maxbytes is not None and size > self.maxbytes:
+                return
+            self._data[key] = value
+            self._sizes[key] = size
+            self.bytes += size
+            while len(self._data) > self.maxsize or (self.maxbytes is not None and self.bytes > self.maxbytes):
+                oldest, _ = self._data.popitem(last=False)
+                self.bytes -= self._sizes.pop(oldest)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        stats = {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+        if self.maxbytes is not None:
+            stats.update(bytes=self.bytes, maxbytes=self.maxbytes)
+        return stats
@@ -0,0 +1,135 @@
+import hashlib
+
+# 纯 Python 实现的 Ed25519 签名（按 RFC 8032 参考实现），只依赖标准库
+# 速度较慢，批量验证见 verifier.py
+
+p = 2 ** 255 - 19
+L = 2 ** 252 + 27742317777372353535851937790883648493  # 基点的阶
+d = -121665 * pow(121666, p - 2, p) % p
+SQRT_M1 = pow(2, (p - 1) // 4, p)
+
+
+def _sha512(data):
+    return hashlib.sha512(data).digest()
+
+
+def _sha512_mod_l(data):
+    return int.from_bytes(_sha512(data), "little") % L
+
+
+# 扩展坐标 (X, Y, Z, T)，x = X/Z，y = Y/Z，x*y = T/Z
+def _point_add(P, Q):
+    A = (P[1] - P[0]) * (Q[1] - Q[0]) % p
+    B = (P[1] + P[0]) * (Q[1] + Q[0]) % p
+    C = 2 * P[3] * Q[3] * d % p
+    D = 2 * P[2] * Q[2] % p
+    E, F, G, H = B - A, D - C, D + C, B + A
+    return (E * F % p, G * H % p, F * G % p, E * H % p)
+
+
+def _point_mul(scalar, P):
+    Q = (0, 1, 1, 0)  # 单位元
+    while scalar > 0:
+        if scalar & 1:
+            Q = _point_add(Q, P)
+        P = _point_add(P, P)
+        scalar >>= 1
+    return Q
+
+
+def _point_equal(P, Q):
+    if (P[0] * Q[2] - Q[0] * P[2]) % p != 0:
+        return False
+    return (P[1] * Q[2] - Q[1] * P[2]) % p == 0
+
+
+def _recover_x(y, sign):
+    if y >= p:
+        return None
+    x2 = (y * y - 1) * pow(d * y * y + 1, p - 2, p) % p
+    if x2 == 0:
+        return None if sign else 0
+    x = pow(x2, (p + 3) // 8, p)
+    if (x * x - x2) % p != 0:
+        x = x * SQRT_M1 % p
+    if (x * x - x2) % p != 0:
+        return None
+    if (x & 1) != sign:
+        x = p - x
+    return x
+
+
+_g_y = 4 * pow(5, p - 2, p) % p
+_g_x = _recover_x(_g_y, 0)
+BASE = (_g_x, _g_y, 1, _g_x * _g_y % p)
+
+
+def _compress(P):
+    z_inv = pow(P[2], p - 2, p)
+    x = P[0] * z_inv % p
+    y = P[1] * z_inv % p
+    return int.to_bytes(y | ((x & 1) << 255), 32, "little")
+
+
+def _decompress(data):
+    if len(data) != 32:
+        return None
+    y = int.from_bytes(data, "little")
+    sign = y >> 255
+    y &= (1 << 255) - 1
+    x = _recover_x(y, sign)
+    if x is None:
+        return None
+    return (x, y, 1, x * y % p)
+
+
+def _expand_secret(secret):
+    if len(secret) != 32:
+        raise ValueError("Ed25519 secret key must be 32 bytes")
+    h = _sha512(secret)
+    a = int.from_bytes(h[:32], "little")
+    a &= (1 << 254) - 8
+    a |= 1 << 254
+    return a, h[32:]
+
+
+def public_key(secret):
+    a, _ = _expand_secret(secret)
+    return _compress(_point_mul(a, BASE))
+
+
+def sign(secret, message):
+    a, prefix = _expand_secret(secret)
+    A = _compress(_point_mul(a, BASE))
+    r = _sha512_mod_l(prefix + message)
+    R = _compress(_point_mul(r, BASE))
+    h = _sha512_mod_l(R + A + message)
+    s = (r + h * a) % L
+    return R + int.to_bytes(s, 32, "little")
+
+
+def verify(public, message, signature):
+    if len(public) != 32 or len(signature) != 64:
+        return False
+    A = _decompress(public)
+    R = _decompress(signature[:32])
+    if A is None or R is None:
+        return False
+    s = int.from_bytes(signature[32:], "little")
+    if s >= L:
+        return False
+    h = _sha512_mod_l(signature[:32] + public + message)
+    return _point_equal(_point_mul(s, BASE), _point_add(R, _point_mul(h, A)))
+
+
+# 自检：RFC 8032 第 7.1 节测试向量 1（空消息）
+if __name__ == "__main__":
+    secret = bytes.fromhex("9d61b19deffd5a60ba844af492ec2cc44449c5697b326919703bac031cae7f60")
+    public = bytes.fromhex("d75a980182b10ab7d54bfed3c964073a0ee172f3daa62325af021a68f707511a")
+    signature = bytes.fromhex("e5564300c360ac729086e2cc806e828a84877f1eb8e5d974d873e065224901555"
+                              "fb8821590a33bacc61e39701cf9b46bd25bf5f0595bbe24655141438e7a100b")
+    assert public_key(secret) == public, "public key does not match RFC 8032 test vector 1"
+    assert sign(secret, b"") == signature, "signature does not match RFC 8032 test vector 1"
+    assert verify(public, b"", signature), "valid signature rejected"
+    assert not verify(public, b"x", signature), "signature accepted for a different message"
+    print("Ed25519 self-check passed")
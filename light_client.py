@@ -0,0 +1,87 @@
+import sys
+import time
+import requests
+from merkle import transaction_hash, header_hash, verify_merkle_proof
+from wallet import transaction_id
+
+class LightClient:
+    # 轻节点：只同步并校验区块头，需要确认交易时向全节点请求默克尔包含证明
+    def __init__(self, node_url, difficulty=4, trusted_header=None):
+        self.node_url = node_url.rstrip('/')
+        self.difficulty = difficulty
+        # 每个区块头只保存 (哈希, 默克尔根) 两个 32 字节值，比保存完整的 JSON 字典小得多
+        self.base_index = None  # 第一个已保存区块头的索引
+        self.headers = []
+        # 信任锚：默认信任节点返回的第一个区块头（创世区块或快照链尖）
+        if trusted_header:
+            self.add_header(trusted_header)
+
+    def add_header(self, header):
+        if self.base_index is None:
+            self.base_index = header["index"]
+        self.headers.append((bytes.fromhex(header["hash"]), bytes.fromhex(header["merkle_root"])))
+
+    def height(self):
+        return self.base_index + len(self.headers) - 1 if self.headers else None
+
+    def get_header(self, index):
+        # 还原校验需要的区块头字段
+        if not self.headers:
+            return None
+        position = index - self.base_index
+        if 0 <= position < len(self.headers):
+            block_hash, root = self.headers[position]
+            return {"index": index, "hash": block_hash.hex(), "merkle_root": root.hex()}
+        return None
+
+    def verify_header(self, header, previous_header):
+        # 校验区块头的连接关系、哈希和工作量证明
+        if header["index"] != previous_header["index"] + 1:
+            return False
+        if header["previous_hash"] != previous_header["hash"]:
+            return False
+        if header["hash"] != header_hash(header["index"], header["previous_hash"], header["timestamp"], header["merkle_root"], header["nonce"]):
+            return False
+        return header["hash"].startswith('0' * self.difficulty)
+
+    def sync(self):
+        # 分页拉取本地最新区块头之后的区块头，逐个校验后追加，返回新增数量
+        added = 0
+        while True:
+            params = {"from": self.height() + 1} if self.headers else {}
+            response = requests.get(f"{self.node_url}/get_headers", params=params)
+            response.raise_for_status()
+            page = response.json()["headers"]
+            if not page:
+                return added
+            for header in page:
+                if self.headers and not self.verify_header(header, self.get_header(self.height())):
+                    print(f"Invalid header at index {header['index']}, stop syncing")
+                    return added
+                self.add_header(header)
+                added += 1
+
+    def verify_transaction(self, block_index, transaction):
+        # 确认交易包含在指定区块中：用本地已校验的区块头中的默克尔根验证证明
+        header = self.get_header(block_index)
+        if header is None:
+            return False
+        # 按交易 ID 请求证明，默克尔叶子是含签名的交易哈希，由本地计算
+        response = requests.get(f"{self.node_url}/get_proof", params={"index": block_index, "txid": transaction_id(transaction)})
+        if response.status_code != 200:
+            return False
+        return verify_merkle_proof(transaction_hash(transaction), response.json()["proof"], header["merkle_root"])
+
+
+# 轻节点模式：持续同步区块头
+if __name__ == "__main__":
+    node_url = sys.argv[1] if len(sys.argv) > 1 else "http://localhost:5000"
+    client = LightClient(node_url)
+    while True:
+        try:
+            added = client.sync()
+            if added:
+                print(f"Synced {added} headers, height {client.height()}")
+        except requests.exceptions.RequestException as e:
+            print(f"Error syncing headers from {node_url}: {e}")
+        time.sleep(5)
@@ -0,0 +1,56 @@
+import hashlib
+import json
+
+
+def _sha256(data):
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def transaction_hash(tx):
+    # 交易哈希：对交易字典做规范化序列化后计算，交易对象和 JSON 还原的字典结果一致
+    return _sha256(json.dumps(tx, sort_keys=True))
+
+
+def header_hash(index, previous_hash, timestamp, merkle_root, nonce):
+    # 区块头哈希只依赖区块头字段，轻节点不需要交易体也能校验
+    return _sha256(f"{index}{previous_hash}{timestamp}{merkle_root}{nonce}")
+
+
+def _next_level(level):
+    # 两两合并；奇数个节点时最后一个直接升到上一层，不复制
+    # （复制会让 [a, b, c] 和 [a, b, c, c] 得到相同的根，即 CVE-2012-2459）
+    merged = [_sha256(level[i] + level[i + 1]) for i in range(0, len(level) - 1, 2)]
+    if len(level) % 2 == 1:
+        merged.append(level[-1])
+    return merged
+
+
+def merkle_root(leaves):
+    # 计算默克尔根
+    if not leaves:
+        return _sha256("")
+    level = list(leaves)
+    while len(level) > 1:
+        level = _next_level(level)
+    return level[0]
+
+
+def merkle_proof(leaves, position):
+    # 生成包含证明：从叶子到根路径上的兄弟节点及其方向
+    proof = []
+    level = list(leaves)
+    while len(level) > 1:
+        sibling = position ^ 1
+        # 升层的最后一个节点没有兄弟，这一层不产生证明项
+        if sibling < len(level):
+            proof.append([level[sibling], "left" if sibling < position else "right"])
+        level = _next_level(level)
+        position //= 2
+    return proof
+
+
+def verify_merkle_proof(leaf, proof, root):
+    current = leaf
+    for sibling, side in proof:
+        current = _sha256(sibling + current) if side == "left" else _sha256(current + sibling)
+    return current == root
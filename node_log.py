@@ -0,0 +1,75 @@
+import logging
+import os
+import threading
+import time
+
+# 节点日志：默认与原来一样直接 print；调用 use_logging() 或设置环境变量
+# BLOCKCHAIN_LOG_LEVEL 后改为分级、限速的 logging 输出
+logger = logging.getLogger("blockchain")
+_use_logging = False
+
+
+class RateLimitFilter(logging.Filter):
+    # 令牌桶限速：每秒最多 rate 条，突发最多 burst 条；WARNING 及以上不限速
+    def __init__(self, rate=10.0, burst=20):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last = time.monotonic()
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            self.dropped += 1
+            return False
+
+
+def use_logging(level="INFO", rate=10.0, burst=20):
+    global _use_logging
+    _use_logging = True
+    logger.setLevel(level)
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(threadName)s %(message)s"))
+        handler.addFilter(RateLimitFilter(rate, burst))
+        logger.addHandler(handler)
+    logger.propagate = False
+
+
+def _emit(level, message):
+    if _use_logging:
+        logger.log(level, message)
+    else:
+        print(message)
+
+
+def debug(message):
+    _emit(logging.DEBUG, message)
+
+
+def info(message):
+    _emit(logging.INFO, message)
+
+
+def warning(message):
+    _emit(logging.WARNING, message)
+
+
+def error(message):
+    _emit(logging.ERROR, message)
+
+
+if os.environ.get("BLOCKCHAIN_LOG_LEVEL"):
+    use_logging(os.environ["BLOCKCHAIN_LOG_LEVEL"].upper(),
+                float(os.environ.get("BLOCKCHAIN_LOG_RATE", "10")),
+                int(os.environ.get("BLOCKCHAIN_LOG_BURST", "20")))
@@ -1,8 +1,11 @@
-import socket
 import threading
 import json
 import time
 import hashlib
+from transport import SocketTransport
+import metrics
+import profiler
+import node_log as log
 
 # 区块类
 class Block:
@@ -24,20 +27,30 @@ class PoW:
 
     def mine(self, block):
         block.nonce = 0
-        while True:
-            block_data = f"{block.index}{block.previous_hash}{block.timestamp}{block.data}{block.nonce}"
-            hash_value = hashlib.sha256(block_data.encode()).hexdigest()
-            if hash_value[:self.difficulty] == '0' * self.difficulty:
-                return hash_value
-            block.nonce += 1
+        start = time.perf_counter()
+        with profiler.section("mining"):
+            while True:
+                block_data = f"{block.index}{block.previous_hash}{block.timestamp}{block.data}{block.nonce}"
+                hash_value = hashlib.sha256(block_data.encode()).hexdigest()
+                if hash_value[:self.difficulty] == '0' * self.difficulty:
+                    break
+                block.nonce += 1
+        elapsed = time.perf_counter() - start
+        metrics.HASHES.inc(block.nonce + 1)
+        metrics.MINING_DURATION.observe(elapsed)
+        if elapsed > 0:
+            metrics.HASH_RATE.set((block.nonce + 1) / elapsed)
+        return hash_value
 
 # 区块链类
 class Blockchain:
-    def __init__(self):
+    def __init__(self, difficulty=4):
         self.chain = [self.create_genesis_block()]
-        self.difficulty = 4
+        self.difficulty = difficulty
         self.pow = PoW(self.difficulty)
         self.pending_transactions = []
+        self.blocks = {self.chain[0].hash_value: self.chain[0]}  # 已知的所有区块，包括分叉上的
+        self.orphans = {}  # 父区块尚未收到的区块：父哈希 -> {区块哈希: 区块}
 
     def create_genesis_block(self):
         return Block(0, "0", int(time.time()), "Genesis Block", "0" * 64)
@@ -46,11 +59,57 @@ class Blockchain:
         return self.chain[-1]
 
     def add_block(self, block):
-        self.chain.append(block)
+        # 保存区块，如果它所在的分支比当前链更长则切换过去（最长链规则）
+        # 返回 True 表示这是一个之前没见过的有效区块
+        if block.hash_value in self.blocks:
+            return False
+        parent = self.blocks.get(block.previous_hash)
+        if parent is None:
+            self.orphans.setdefault(block.previous_hash, {})[block.hash_value] = block
+            return False
+        if not self.is_block_valid(block, parent):
+            return False
+        self.blocks[block.hash_value] = block
+        if block.index > self.get_latest_block().index:
+            self.switch_to(block)
+        # 之前因为缺少父区块而暂存的子区块现在可以接上了
+        for child in self.orphans.pop(block.hash_value, {}).values():
+            self.add_block(child)
+        return True
+
+    def is_block_valid(self, block, parent):
+        if block.index != parent.index + 1:
+            return False
+        block_data = f"{block.index}{block.previous_hash}{block.timestamp}{block.data}{block.nonce}"
+        if block.hash_value != hashlib.sha256(block_data.encode()).hexdigest():
+            return False
+        return block.hash_value[:self.difficulty] == '0' * self.difficulty
+
+    def switch_to(self, block):
+        # 从新链尖回溯到与当前链的分叉点，替换分叉点之后的区块
+        branch = []
+        current = block
+        while current.index >= len(self.chain) or self.chain[current.index].hash_value != current.hash_value:
+            branch.append(current)
+            current = self.blocks[current.previous_hash]
+        del self.chain[current.index + 1:]
+        for new_block in reversed(branch):
+            self.chain.append(new_block)
+            self.remove_mined_transactions(new_block)
 
-    def mine_block(self, data):
+    def remove_mined_transactions(self, block):
+        # 区块数据是交易列表的 JSON 时，把已上链的交易从交易池中移除
+        try:
+            mined = json.loads(block.data)
+        except (TypeError, ValueError):
+            return
+        if isinstance(mined, list) and self.pending_transactions:
+            self.pending_transactions = [tx for tx in self.pending_transactions if tx not in mined]
+            metrics.MEMPOOL_SIZE.set(len(self.pending_transactions))
+
+    def mine_block(self, data, timestamp=None):
         latest_block = self.get_latest_block()
-        timestamp = int(time.time())
+        timestamp = int(time.time()) if timestamp is None else timestamp
         new_block = Block(latest_block.index + 1, latest_block.hash_value, timestamp, data, "")
         new_block_hash = self.pow.mine(new_block)
         new_block.hash_value = new_block_hash
@@ -61,91 +120,141 @@ class Blockchain:
         return self.chain
 
     def is_chain_valid(self):
-        for i in range(1, len(self.chain)):
-            current_block = self.chain[i]
-            previous_block = self.chain[i - 1]
-            block_data = f"{current_block.index}{current_block.previous_hash}{current_block.timestamp}{current_block.data}{current_block.nonce}"
-            if current_block.hash_value != hashlib.sha256(block_data.encode()).hexdigest():
-                return False
-            if current_block.previous_hash != previous_block.hash_value:
-                return False
-        return True
+        with metrics.VALIDATION_DURATION.time(), profiler.section("validation"):
+            for i in range(1, len(self.chain)):
+                current_block = self.chain[i]
+                previous_block = self.chain[i - 1]
+                block_data = f"{current_block.index}{current_block.previous_hash}{current_block.timestamp}{current_block.data}{current_block.nonce}"
+                if current_block.hash_value != hashlib.sha256(block_data.encode()).hexdigest():
+                    return False
+                if current_block.previous_hash != previous_block.hash_value:
+                    return False
+            return True
 
     def add_transaction(self, transaction):
         self.pending_transactions.append(transaction)
+        metrics.MEMPOOL_SIZE.set(len(self.pending_transactions))
 
-    def process_transactions(self):
+    def process_transactions(self, max_transactions=None, timestamp=None):
+        # 把交易池中的交易（最多 max_transactions 笔）打包挖出一个区块
         if self.pending_transactions:
-            transaction_data = json.dumps(self.pending_transactions, sort_keys=True)
-            new_block = self.mine_block(transaction_data)
-            self.pending_transactions = []
+            batch = self.pending_transactions[:max_transactions]
+            transaction_data = json.dumps(batch, sort_keys=True)
+            new_block = self.mine_block(transaction_data, timestamp)
+            self.pending_transactions = [tx for tx in self.pending_transactions if tx not in batch]
+            metrics.MEMPOOL_SIZE.set(len(self.pending_transactions))
             return new_block
         return None
 
+# 节点能处理的消息类型，其他类型在指标中记为 "unknown"，避免标签取值无限增长
+MESSAGE_TYPES = ('block', 'get_block', 'transaction', 'peer')
+
 # 网络节点类
 class Node:
-    def __init__(self, host, port, blockchain):
+    def __init__(self, host, port, blockchain, metrics_port=None, transport=None):
         self.host = host
         self.port = port
         self.blockchain = blockchain
         self.peers = []  # 其他节点的地址
-        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.server.bind((self.host, self.port))
-        self.server.listen(5)
+        self.metrics_port = metrics_port  # 提供 /metrics 的 HTTP 端口，None 表示不启动
+        self.seen_transactions = set()  # 已处理过的交易，避免重复转发
+        self.clock = time.time  # 时间来源，模拟器中替换为模拟时钟
+        # 默认使用 TCP 套接字，模拟器中替换为模拟网络的传输层
+        self.transport = transport or SocketTransport()
+        self.server = self.transport.bind(self)
 
     def start(self):
-        print(f"Node started at {self.host}:{self.port}")
-        threading.Thread(target=self.listen_for_connections).start()
+        log.info(f"Node started at {self.host}:{self.port}")
+        if self.metrics_port is not None:
+            metrics.start_metrics_server(self.metrics_port, self.host)
+        if self.server is not None:
+            threading.Thread(target=self.listen_for_connections).start()
 
     def listen_for_connections(self):
         while True:
             client_socket, client_address = self.server.accept()
-            print(f"Connection established with {client_address}")
+            log.debug(f"Connection established with {client_address}")
             threading.Thread(target=self.handle_client, args=(client_socket,)).start()
 
     def handle_client(self, client_socket):
-        data = client_socket.recv(1024).decode('utf-8')
+        # 发送方每条消息单独建立连接，读到连接关闭为止
+        chunks = []
+        while True:
+            chunk = client_socket.recv(4096)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        data = b"".join(chunks).decode('utf-8')
         if data:
-            print(f"Received data: {data}")
+            log.debug(f"Received data: {data}")
             self.process_received_data(data)
         client_socket.close()
 
     def process_received_data(self, data):
+        start = time.perf_counter()
+        message_type = "unknown"
         try:
             message = json.loads(data)
+            if message['type'] in MESSAGE_TYPES:
+                message_type = message['type']
             if message['type'] == 'block':
+                if 'sent_at' in message:
+                    metrics.BLOCK_PROPAGATION.observe(max(self.clock() - message['sent_at'], 0))
                 block = Block(**message['block'])
-                self.blockchain.add_block(block)
-                print(f"Block added to blockchain: {block}")
+                if self.blockchain.add_block(block):
+                    log.info(f"Block added to blockchain: {block}")
+                    # 转发新区块给其他节点
+                    self.send_to_peers(message, exclude=message.get('from'))
+                elif block.previous_hash not in self.blockchain.blocks and 'from' in message:
+                    # 缺少父区块（可能是消息丢失），向发送方请求
+                    self.send_to_peer(message['from'], {'type': 'get_block', 'hash': block.previous_hash})
+            elif message['type'] == 'get_block':
+                block = self.blockchain.blocks.get(message['hash'])
+                if block is not None and 'from' in message:
+                    self.send_to_peer(message['from'], {'type': 'block', 'block': block.__dict__})
             elif message['type'] == 'transaction':
-                self.blockchain.add_transaction(message['transaction'])
-                print(f"Transaction added: {message['transaction']}")
+                key = json.dumps(message['transaction'], sort_keys=True)
+                if key not in self.seen_transactions:
+                    self.seen_transactions.add(key)
+                    self.blockchain.add_transaction(message['transaction'])
+                    log.debug(f"Transaction added: {message['transaction']}")
+                    self.send_to_peers(message, exclude=message.get('from'))
             elif message['type'] == 'peer':
                 self.peers.append(message['peer'])
-                print(f"New peer added: {message['peer']}")
+                log.info(f"New peer added: {message['peer']}")
         except Exception as e:
-            print(f"Error processing data: {e}")
+            log.error(f"Error processing data: {e}")
+        metrics.REQUEST_LATENCY.observe(time.perf_counter() - start, endpoint=message_type)
 
     def broadcast_block(self, block):
         message = {
             'type': 'block',
-            'block': block.__dict__
+            'block': block.__dict__,
+            'sent_at': self.clock()  # 接收方据此统计区块传播延迟
         }
         self.send_to_peers(message)
 
     def broadcast_transaction(self, transaction):
+        self.seen_transactions.add(json.dumps(transaction, sort_keys=True))
         message = {
             'type': 'transaction',
             'transaction': transaction
         }
         self.send_to_peers(message)
 
-    def send_to_peers(self, message):
+    def send_to_peers(self, message, exclude=None):
         for peer in self.peers:
-            peer_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            peer_socket.connect((peer[0], peer[1]))
-            peer_socket.send(json.dumps(message).encode('utf-8'))
-            peer_socket.close()
+            if exclude is not None and tuple(peer) == tuple(exclude):
+                continue
+            self.send_to_peer(peer, message)
+
+    def send_to_peer(self, peer, message):
+        # 附上本节点地址，接收方可以回复（如请求缺失的父区块）
+        message = dict(message)
+        message['from'] = (self.host, self.port)
+        start = time.perf_counter()
+        self.transport.send(peer, message)
+        metrics.PEER_SEND_LATENCY.observe(time.perf_counter() - start, peer=f"{peer[0]}:{peer[1]}")
 
     def add_peer(self, peer_host, peer_port):
         self.peers.append((peer_host, peer_port))
@@ -0,0 +1,81 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# 可选的采样分析器：设置环境变量 BLOCKCHAIN_PROFILE=1 或调用 enable() 后，
+# 在挖矿、验证等热点循环中按固定间隔采样当前线程的调用栈
+_enabled = os.environ.get("BLOCKCHAIN_PROFILE") == "1"
+_interval = float(os.environ.get("BLOCKCHAIN_PROFILE_INTERVAL", "0.001"))
+_samples = {}  # 区段名 -> Counter(调用位置 -> 采样次数)
+_lock = threading.Lock()
+
+
+def enable(interval=0.001):
+    global _enabled, _interval
+    _enabled = True
+    _interval = interval
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+
+
+def _sample_loop(thread_id, section, stop_event):
+    while not stop_event.wait(_interval):
+        frame = sys._current_frames().get(thread_id)
+        if frame is None:
+            continue
+        location = f"{frame.f_code.co_filename}:{frame.f_lineno} {frame.f_code.co_name}"
+        with _lock:
+            _samples.setdefault(section, Counter())[location] += 1
+
+
+@contextmanager
+def section(name):
+    # 未启用时几乎没有开销；启用后由后台线程对本线程采样
+    if not _enabled:
+        yield
+        return
+    stop_event = threading.Event()
+    sampler = threading.Thread(target=_sample_loop, args=(threading.get_ident(), name, stop_event), daemon=True)
+    sampler.start()
+    try:
+        yield
+    finally:
+        stop_event.set()
+        sampler.join()
+
+
+def report(top=10):
+    # 返回每个区段采样次数最多的调用位置
+    with _lock:
+        return {name: counter.most_common(top) for name, counter in _samples.items()}
+
+
+def print_report(top=10):
+    for name, locations in report(top).items():
+        total = sum(_samples[name].values())
+        print(f"[{name}] {total} samples")
+        for location, count in locations:
+            print(f"  {count / total * 100:5.1f}%  {location}")
+
+
+if __name__ == "__main__":
+    # 示例：对一次挖矿进行采样分析
+    from blockchain_center_dist import Blockchain
+    enable()
+    blockchain = Blockchain(difficulty=4)
+    blockchain.add_transaction("Alice", "Bob", 10)
+    start = time.time()
+    blockchain.mine_block("Miner1")
+    print(f"Mined in {time.time() - start:.2f}s")
+    print_report()
@@ -0,0 +1,30 @@
+import sys
+import requests
+from block_filter import BloomFilter
+
+# 要查找的钱包地址
+address = sys.argv[1] if len(sys.argv) > 1 else "Alice"
+
+# 分页下载区块的过滤器，直到返回空页
+# 只拉取过滤器匹配的区块，再检查其中的交易（过滤器可能误报）
+scanned = 0
+matched = 0
+params = {}
+while True:
+    filters = requests.get("http://localhost:5000/filters", params=params).json()["filters"]
+    if not filters:
+        break
+    for item in filters:
+        bloom = BloomFilter.from_dict(item["filter"], key=item["hash"])
+        if address not in bloom:
+            continue
+        block = requests.get("http://localhost:5000/get_blocks", params={"from": item["index"], "to": item["index"]}).json()["blocks"][0]
+        transactions = [tx for tx in block["transactions"] if address in (tx["sender"], tx["recipient"])]
+        if transactions:
+            matched += 1
+            print(f"Block {block['index']} - Hash: {block['hash']}")
+            print(f"  Transactions: {transactions}")
+    scanned += len(filters)
+    params = {"from": filters[-1]["index"] + 1}
+
+print(f"Scanned {scanned} filters, {matched} blocks involve {address}")
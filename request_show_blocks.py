@@ -1,9 +1,15 @@
+import sys
+import time
 import requests
 
-# 发送请求以获取所有区块
-def get_all_blocks():
-    response = requests.get("http://localhost:5000/get_blocks")
-    
+# 发送请求以获取所有区块，带上上次的 ETag，区块未变化时服务端返回 304
+def get_all_blocks(etag=None):
+    headers = {"If-None-Match": etag} if etag else {}
+    response = requests.get("http://localhost:5000/get_blocks", headers=headers)
+
+    if response.status_code == 304:
+        print("Blocks not modified.")
+        return etag
     if response.status_code == 200:
         blocks = response.json().get("blocks", [])
         if blocks:
@@ -14,8 +20,13 @@ def get_all_blocks():
                 print(f"  Transactions: {block['transactions']}")
         else:
             print("No blocks found.")
-    else:
-        print(f"Failed to get blocks. Status code: {response.status_code}")
+        return response.headers.get("ETag")
+    print(f"Failed to get blocks. Status code: {response.status_code}")
+    return etag
 
-# 调用函数，打印所有区块
-get_all_blocks()
+# 调用函数，打印所有区块；使用 --poll 参数时每隔 5 秒轮询一次
+etag = get_all_blocks()
+if "--poll" in sys.argv[1:]:
+    while True:
+        time.sleep(5)
+        etag = get_all_blocks(etag)
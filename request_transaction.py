@@ -1,11 +1,9 @@
 import requests
+from wallet import Wallet
 
-# 发送交易请求
-transaction_data = {
-    "sender": "Alice",
-    "recipient": "Bob",
-    "amount": 10
-}
+# 发送交易请求（节点只接受发送方钱包签名的交易）
+alice, bob = Wallet(), Wallet()
+transaction_data = alice.sign_transaction(bob.address, 10)
 
 response = requests.post('http://localhost:5008/add_transaction', json=transaction_data)
 
@@ -0,0 +1,343 @@
+import argparse
+import heapq
+import json
+import random
+import node_log
+import p2p
+from transport import Transport
+
+# 单进程离散事件网络模拟器：在模拟网络上运行大量节点，观察传播、分叉和吞吐随节点数和区块大小的变化
+
+
+class SimNetwork:
+    # 模拟网络：事件队列按模拟时间排序，消息延迟 = 基础延迟 + 抖动 + 消息大小 / 带宽
+    def __init__(self, latency=0.05, jitter=0.02, bandwidth=1_000_000, loss=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth  # 字节/秒
+        self.loss = loss  # 丢包率
+        self.rng = random.Random(seed)
+        self.now = 0.0
+        self.receivers = {}  # 节点地址 -> 收到消息时调用的函数
+        self.messages_sent = 0
+        self.messages_dropped = 0
+        self.bytes_sent = 0
+        self._queue = []
+        self._seq = 0  # 同一时间的事件按加入顺序执行，保证结果可复现
+
+    def schedule(self, delay, callback, *args):
+        heapq.heappush(self._queue, (self.now + delay, self._seq, callback, args))
+        self._seq += 1
+
+    def register(self, address, receiver):
+        self.receivers[address] = receiver
+
+    def send(self, peer, data):
+        self.messages_sent += 1
+        self.bytes_sent += len(data)
+        if self.rng.random() < self.loss:
+            self.messages_dropped += 1
+            return
+        delay = self.latency + self.rng.uniform(0, self.jitter) + len(data) / self.bandwidth
+        self.schedule(delay, self.deliver, peer, data)
+
+    def deliver(self, peer, data):
+        receiver = self.receivers.get(peer)
+        if receiver is not None:
+            receiver(data)
+
+    def run(self, until=None):
+        while self._queue and (until is None or self._queue[0][0] <= until):
+            self.now, _, callback, args = heapq.heappop(self._queue)
+            callback(*args)
+        if until is not None:
+            self.now = max(self.now, until)
+
+
+def address_key(peer):
+    # p2p 节点地址是 (host, port)，经过 JSON 后会变成列表；HTTP 节点地址是 "host:port"
+    return tuple(peer) if isinstance(peer, (list, tuple)) else peer
+
+
+class SimTransport(Transport):
+    def __init__(self, network):
+        self.network = network
+
+    def bind(self, node):
+        self.network.register((node.host, node.port), node.process_received_data)
+        return None
+
+    def send(self, peer, message):
+        self.network.send(address_key(peer), json.dumps(message))
+
+
+class P2PSimNode:
+    # 复用 p2p.Node 的节点逻辑：gossip 转发、分叉处理和缺失区块请求
+    def __init__(self, index, network, difficulty):
+        self.address = (f"node{index}", index)
+        self.node = p2p.Node(self.address[0], self.address[1], p2p.Blockchain(difficulty), transport=SimTransport(network))
+        self.node.clock = lambda: network.now
+        self.receive = self.node.process_received_data
+
+    def connect(self, other):
+        self.node.peers.append(other.address)
+
+    def tip(self):
+        return self.node.blockchain.get_latest_block().hash_value
+
+    def knows(self, block_hash):
+        return block_hash in self.node.blockchain.blocks
+
+    def submit_transaction(self, transaction):
+        self.node.blockchain.add_transaction(transaction)
+        self.node.broadcast_transaction(transaction)
+
+    def mine(self, block_size, timestamp):
+        blockchain = self.node.blockchain
+        block = blockchain.process_transactions(block_size, timestamp)
+        if block is None:
+            block = blockchain.mine_block(json.dumps([]), timestamp)
+        self.node.broadcast_block(block)
+        return block.hash_value
+
+    def chain_length(self):
+        return len(self.node.blockchain.chain)
+
+    def confirmed_transactions(self):
+        confirmed = set()
+        for block in self.node.blockchain.chain[1:]:
+            for transaction in json.loads(block.data):
+                confirmed.add(transaction["sender"])
+        return confirmed
+
+
+class HttpSimNode:
+    # 复用 blockchain_center_dist.Blockchain 的节点逻辑；HTTP 节点不转发区块，因此使用全连接拓扑
+    def __init__(self, index, network, difficulty, genesis=None):
+        # 延迟导入：只模拟 p2p 节点时不需要 Flask
+        import blockchain_center_dist
+        self.address = f"node{index}:80"
+        self.blockchain = blockchain_center_dist.Blockchain(difficulty)
+        if genesis is not None:
+            # 创世区块带有创建时间，所有节点共用同一个创世区块
+            self.blockchain.chain = [genesis]
+        self.blockchain.clock = lambda: network.now
+        self.blockchain.transport = SimTransport(network)
+        # 用列表保存邻居，广播顺序固定，模拟结果才能复现
+        self.blockchain.nodes = []
+        self.known = {self.blockchain.chain[0].hash}  # 已接受的区块哈希
+        network.register(self.address, self.receive)
+
+    def receive(self, data):
+        message = json.loads(data)
+        if message['type'] == 'block':
+            block = self.blockchain.receive_block(message['block'], message.get('sent_at'))
+            if block is not None:
+                self.known.add(block.hash)
+        elif message['type'] == 'transaction':
+            transaction = message['transaction']
+            self.blockchain.add_transaction(transaction['sender'], transaction['recipient'], transaction['amount'])
+
+    def connect(self, other):
+        self.blockchain.nodes.append(other.address)
+
+    def tip(self):
+        return self.blockchain.chain[-1].hash
+
+    def knows(self, block_hash):
+        return block_hash in self.known
+
+    def submit_transaction(self, transaction):
+        self.blockchain.add_transaction(transaction['sender'], transaction['recipient'], transaction['amount'])
+
+    def mine(self, block_size, timestamp):
+        blockchain = self.blockchain
+        rest = blockchain.pending_transactions[block_size:]
+        blockchain.pending_transactions = blockchain.pending_transactions[:block_size]
+        block = blockchain.mine_block(self.address, allow_empty=True)
+        blockchain.pending_transactions = rest + blockchain.pending_transactions
+        self.known.add(block.hash)
+        blockchain.broadcast_new_block(block)
+        return block.hash
+
+    def chain_length(self):
+        return len(self.blockchain.chain)
+
+    def confirmed_transactions(self):
+        confirmed = set()
+        for block in self.blockchain.chain[1:]:
+            for transaction in block.transactions:
+                if transaction.sender != "System":
+                    confirmed.add(transaction.sender)
+        return confirmed
+
+
+class Simulation:
+    def __init__(self, n_nodes=50, block_size=10, node_type="p2p", degree=8, block_interval=15.0, tx_rate=1.0,
+                 duration=600.0, latency=0.05, jitter=0.02, bandwidth=1_000_000, loss=0.0, difficulty=1, seed=0):
+        self.block_size = block_size
+        self.block_interval = block_interval  # 全网平均出块间隔（模拟秒）
+        self.tx_rate = tx_rate  # 每模拟秒产生的交易数
+        self.duration = duration
+        self.rng = random.Random(seed)
+        self.network = SimNetwork(latency, jitter, bandwidth, loss, seed=seed + 1)
+
+        if node_type == "p2p":
+            self.nodes = [P2PSimNode(i, self.network, difficulty) for i in range(n_nodes)]
+            self._connect_random(degree)
+        elif node_type == "http":
+            first = HttpSimNode(0, self.network, difficulty)
+            self.nodes = [first] + [HttpSimNode(i, self.network, difficulty, first.blockchain.chain[0]) for i in range(1, n_nodes)]
+            for node in self.nodes:
+                for other in self.nodes:
+                    if other is not node:
+                        node.connect(other)
+        else:
+            raise ValueError(f"Unknown node type: {node_type}")
+
+        # 包装接收函数，记录每个区块到达每个节点的时间和链尖变化时间
+        self.mined = {}  # 区块哈希 -> 挖出时间
+        self.reached = {}  # 区块哈希 -> 已知该区块的节点数
+        self.propagation = []  # 区块到达所有节点所用的时间
+        self.last_tip_change = [0.0] * n_nodes
+        self.last_mined_at = 0.0
+        self.tx_count = 0
+        for position, node in enumerate(self.nodes):
+            self.network.register(address_key(node.address), self._make_receiver(position, node))
+
+    def _connect_random(self, degree):
+        # 随机拓扑：先连成环保证连通，再补充随机连接，连接是双向的
+        n = len(self.nodes)
+        links = set()
+        for i in range(n):
+            links.add((min(i, (i + 1) % n), max(i, (i + 1) % n)))
+        for i in range(n):
+            for j in self.rng.sample(range(n), min(degree // 2, n - 1)):
+                if i != j:
+                    links.add((min(i, j), max(i, j)))
+        for i, j in sorted(links):
+            if i != j:
+                self.nodes[i].connect(self.nodes[j])
+                self.nodes[j].connect(self.nodes[i])
+
+    def _make_receiver(self, position, node):
+        seen = set()
+
+        def receive(data):
+            tip = node.tip()
+            node.receive(data)
+            if node.tip() != tip:
+                self.last_tip_change[position] = self.network.now
+            message = json.loads(data)
+            if message['type'] != 'block':
+                return
+            block_hash = message['block'].get('hash_value') or message['block'].get('hash')
+            if block_hash in self.mined and block_hash not in seen and node.knows(block_hash):
+                seen.add(block_hash)
+                self._record_arrival(block_hash)
+
+        return receive
+
+    def _record_arrival(self, block_hash):
+        self.reached[block_hash] += 1
+        if self.reached[block_hash] == len(self.nodes):
+            self.propagation.append(self.network.now - self.mined[block_hash])
+
+    def _mine(self):
+        if self.network.now > self.duration:
+            return
+        position = self.rng.randrange(len(self.nodes))
+        node = self.nodes[position]
+        block_hash = node.mine(self.block_size, int(self.network.now))
+        self.mined[block_hash] = self.network.now
+        self.reached[block_hash] = 0
+        self._record_arrival(block_hash)
+        self.last_mined_at = self.network.now
+        self.last_tip_change[position] = self.network.now
+        self.network.schedule(self.rng.expovariate(1 / self.block_interval), self._mine)
+
+    def _new_transaction(self):
+        if self.network.now > self.duration:
+            return
+        transaction = {"sender": f"user{self.tx_count}", "recipient": f"user{self.tx_count + 1}", "amount": 1}
+        self.tx_count += 1
+        self.rng.choice(self.nodes).submit_transaction(transaction)
+        self.network.schedule(self.rng.expovariate(self.tx_rate), self._new_transaction)
+
+    def run(self):
+        self.network.schedule(self.rng.expovariate(1 / self.block_interval), self._mine)
+        if self.tx_rate > 0:
+            self.network.schedule(self.rng.expovariate(self.tx_rate), self._new_transaction)
+        # 停止出块后继续运行，直到所有消息送达
+        self.network.run()
+        return self.report()
+
+    def report(self):
+        tips = [node.tip() for node in self.nodes]
+        converged = len(set(tips)) == 1
+        best = max(self.nodes, key=lambda node: node.chain_length())
+        main_chain_blocks = best.chain_length() - 1
+        blocks_mined = len(self.mined)
+        propagation = sorted(self.propagation)
+        return {
+            "nodes": len(self.nodes),
+            "block_size": self.block_size,
+            "blocks_mined": blocks_mined,
+            "main_chain_blocks": main_chain_blocks,
+            "orphan_rate": (blocks_mined - main_chain_blocks) / blocks_mined if blocks_mined else 0.0,
+            "converged": converged,
+            "convergence_time": max(self.last_tip_change) - self.last_mined_at if converged else None,
+            "mean_propagation": sum(propagation) / len(propagation) if propagation else None,
+            "p90_propagation": propagation[int(len(propagation) * 0.9)] if propagation else None,
+            "tx_submitted": self.tx_count,
+            "tx_confirmed": len(best.confirmed_transactions()),
+            "tx_per_sec": len(best.confirmed_transactions()) / self.duration,
+            "messages_sent": self.network.messages_sent,
+            "messages_dropped": self.network.messages_dropped,
+            "bytes_sent": self.network.bytes_sent,
+        }
+
+
+def _format(value):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    return str(value)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Discrete-event multi-node network simulator")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[50, 100, 200])
+    parser.add_argument("--block-size", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--node-type", choices=["p2p", "http"], default="p2p")
+    parser.add_argument("--degree", type=int, default=8, help="peers per p2p node")
+    parser.add_argument("--block-interval", type=float, default=15.0, help="mean seconds between blocks")
+    parser.add_argument("--tx-rate", type=float, default=1.0, help="transactions per simulated second")
+    parser.add_argument("--duration", type=float, default=600.0, help="simulated seconds of mining")
+    parser.add_argument("--latency", type=float, default=0.05, help="base link latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02, help="max extra random latency in seconds")
+    parser.add_argument("--bandwidth", type=float, default=1_000_000, help="link bandwidth in bytes per second")
+    parser.add_argument("--loss", type=float, default=0.0, help="message loss probability")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    # 大量节点时屏蔽节点的普通输出
+    node_log.use_logging("WARNING")
+
+    columns = ["nodes", "block_size", "blocks_mined", "orphan_rate", "converged", "convergence_time",
+               "mean_propagation", "p90_propagation", "tx_per_sec", "messages_sent"]
+    print("  ".join(f"{column:>16}" for column in columns))
+    results = []
+    for n_nodes in args.nodes:
+        for block_size in args.block_size:
+            simulation = Simulation(n_nodes, block_size, args.node_type, args.degree, args.block_interval, args.tx_rate,
+                                    args.duration, args.latency, args.jitter, args.bandwidth, args.loss, seed=args.seed)
+            result = simulation.run()
+            results.append(result)
+            print("  ".join(f"{_format(result[column]):>16}" for column in columns))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
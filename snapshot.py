@@ -0,0 +1,53 @@
+import gzip
+import hashlib
+import json
+import os
+
+SNAPSHOT_VERSION = 2
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def snapshot_hash(payload):
+    # 快照哈希：对快照内容做规范化序列化后计算 sha256，覆盖链尖和全部派生状态
+    # 节点从可信来源获得这个哈希，加载时据此校验整个快照
+    payload_bytes = json.dumps(payload, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(payload_bytes).hexdigest()
+
+
+def write_snapshot(path, payload):
+    # 将链尖、检查点和派生状态写入一个压缩并带校验和的文件，返回快照哈希
+    checksum = snapshot_hash(payload)
+    document = {
+        "version": SNAPSHOT_VERSION,
+        "checksum": checksum,
+        "payload": payload
+    }
+    # 先写临时文件再原子替换，写到一半崩溃也不会留下损坏的快照
+    temp_path = f"{path}.tmp"
+    try:
+        with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+            json.dump(document, f, sort_keys=True)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return checksum
+
+
+def read_snapshot(path):
+    # 读取快照文件，并校验版本和校验和（校验和只能发现文件损坏，可信校验见 snapshot_hash）
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            document = json.load(f)
+    except (OSError, ValueError) as e:
+        raise SnapshotError(f"Cannot read snapshot {path}: {e}")
+
+    if document.get("version") != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot version: {document.get('version')}")
+    payload = document.get("payload")
+    if payload is None or snapshot_hash(payload) != document.get("checksum"):
+        raise SnapshotError("Snapshot checksum mismatch")
+    return payload
@@ -0,0 +1,43 @@
+import json
+import socket
+from abc import ABC, abstractmethod
+import requests
+
+# 传输层抽象：节点逻辑只调用 bind/send，具体用套接字、HTTP 还是模拟网络由传输层决定
+
+
+class Transport(ABC):
+    def bind(self, node):
+        # 让节点开始接收消息，返回监听用的套接字（没有则返回 None）
+        return None
+
+    @abstractmethod
+    def send(self, peer, message):
+        pass
+
+
+class SocketTransport(Transport):
+    # p2p.py 使用的 TCP 套接字传输，每条消息一个连接
+    def bind(self, node):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind((node.host, node.port))
+        server.listen(5)
+        return server
+
+    def send(self, peer, message):
+        # 接收方读到连接关闭为止，sendall 保证大区块也完整发出
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as peer_socket:
+            peer_socket.connect((peer[0], peer[1]))
+            peer_socket.sendall(json.dumps(message).encode('utf-8'))
+
+
+class HttpTransport(Transport):
+    # blockchain_center_dist.py 使用的 HTTP 传输，按消息类型映射到 Flask 接口
+    def send(self, peer, message):
+        if message['type'] == 'block':
+            headers = {"X-Sent-At": str(message['sent_at'])} if 'sent_at' in message else {}
+            requests.post(f"http://{peer}/add_block", json=message['block'], headers=headers)
+        elif message['type'] == 'transaction':
+            requests.post(f"http://{peer}/add_transaction", json=message['transaction'])
+        else:
+            raise ValueError(f"Unsupported message type for HTTP transport: {message['type']}")
@@ -0,0 +1,85 @@
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from cache import LRUCache
+from wallet import transaction_id, verify_transaction_signature
+
+
+def verify_batch(transactions):
+    # 在工作进程中逐个验证一批交易的签名
+    return [verify_transaction_signature(tx) for tx in transactions]
+
+
+class BatchVerifier:
+    # 签名验证流水线：把陆续到达的交易攒成批，交给进程池并行验证；
+    # 已验证的交易 ID 记入缓存，区块验证时可以直接跳过
+    def __init__(self, batch_size=32, max_delay=0.005, workers=None, cache_size=100000):
+        self.batch_size = batch_size
+        self.max_delay = max_delay  # 批未满时最多等待的秒数
+        self.workers = workers
+        self.verified = LRUCache(cache_size)  # 交易 ID -> 验证通过的签名
+        self._executor = None
+        self._pending = []  # (交易 ID, 交易, Future)
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers)
+        return self._executor
+
+    def is_verified(self, tx):
+        # 同一交易 ID 且签名相同才算已验证，避免用无效签名顶替
+        signature = tx.get("signature")
+        return signature is not None and self.verified.get(transaction_id(tx)) == signature
+
+    def submit(self, tx):
+        # 提交一笔交易，返回 Future，结果为签名是否有效
+        future = Future()
+        if self.is_verified(tx):
+            future.set_result(True)
+            return future
+        with self._lock:
+            self._pending.append((transaction_id(tx), tx, future))
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.max_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        return future
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        job = self._get_executor().submit(verify_batch, [tx for _, tx, _ in batch])
+        job.add_done_callback(lambda job: self._finish(batch, job))
+
+    def _finish(self, batch, job):
+        error = job.exception()
+        if error is not None:
+            for _, _, future in batch:
+                future.set_exception(error)
+            return
+        for (txid, tx, future), valid in zip(batch, job.result()):
+            if valid:
+                self.verified.put(txid, tx["signature"])
+            future.set_result(valid)
+
+    def verify_many(self, transactions):
+        # 验证一组交易（如整个区块），未缓存的交易分批并行验证
+        futures = [self.submit(tx) for tx in transactions]
+        self.flush()
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        self.flush()
+        if self._executor is not None:
+            self._executor.shutdown()
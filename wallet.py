@@ -0,0 +1,40 @@
+import hashlib
+import json
+import os
+import ed25519
+
+# 钱包与交易签名：地址就是 Ed25519 公钥的十六进制，交易 ID 只覆盖交易内容，不含签名
+
+
+def signing_payload(tx):
+    # 签名和交易 ID 使用同一份规范化的交易内容
+    payload = {"sender": tx["sender"], "recipient": tx["recipient"], "amount": tx["amount"], "nonce": tx.get("nonce", 0)}
+    return json.dumps(payload, sort_keys=True).encode('utf-8')
+
+
+def transaction_id(tx):
+    # 稳定的交易 ID：与签名无关，同一笔交易无论谁转发都得到相同的 ID
+    return hashlib.sha256(signing_payload(tx)).hexdigest()
+
+
+def verify_transaction_signature(tx):
+    # 校验发送方（公钥）对交易内容的签名
+    try:
+        public = bytes.fromhex(tx["sender"])
+        signature = bytes.fromhex(tx.get("signature") or "")
+    except (ValueError, TypeError):
+        return False
+    return ed25519.verify(public, signing_payload(tx), signature)
+
+
+class Wallet:
+    def __init__(self, secret=None):
+        self.secret = secret or os.urandom(32)
+        self.address = ed25519.public_key(self.secret).hex()
+        self.nonce = 0  # 每笔交易递增，相同金额的交易也有不同的 ID
+
+    def sign_transaction(self, recipient, amount):
+        tx = {"sender": self.address, "recipient": recipient, "amount": amount, "nonce": self.nonce}
+        tx["signature"] = ed25519.sign(self.secret, signing_payload(tx)).hex()
+        self.nonce += 1
+        return tx